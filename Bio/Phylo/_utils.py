@@ -10,9 +10,12 @@
 Third-party libraries are loaded when the corresponding function is called.
 """
 
+import functools
 import math
 import sys
 
+import numpy as np
+
 from Bio import MissingPythonDependencyError
 
 
@@ -32,53 +35,71 @@ def to_networkx(tree):
             "Install NetworkX if you want to use to_networkx."
         ) from None
 
+    def edge_data(n1, n2):
+        """Build the attribute dict for the edge from clade n1 to n2."""
+        data = {"weight": n2.branch_length or 1.0}
+        # Copy branch color value as hex, if available
+        # NB: getattr with a default avoids hasattr's exception path,
+        # which matters when this runs once per edge
+        n2_color = getattr(n2, "color", None)
+        n1_color = getattr(n1, "color", None)
+        if n2_color is not None:
+            data["color"] = n2_color.to_hex()
+        elif n1_color is not None:
+            # Cascading color attributes
+            data["color"] = n1_color.to_hex()
+            n2.color = n1_color
+        # Copy branch weight value (float) if available
+        n2_width = getattr(n2, "width", None)
+        n1_width = getattr(n1, "width", None)
+        if n2_width is not None:
+            data["width"] = n2_width
+        elif n1_width is not None:
+            # Cascading width attributes
+            data["width"] = n1_width
+            n2.width = n1_width
+        return data
+
+    def collect_edges(top):
+        """Walk down the Tree, collecting (parent, child) clade pairs.
+
+        Uses an explicit stack rather than recursion, so deep trees do not
+        hit Python's recursion limit. Each parent precedes its children in
+        the returned list.
+        """
+        pairs = []
+        stack = [top]
+        while stack:
+            parent = stack.pop()
+            for clade in parent:
+                pairs.append((parent.root, clade.root))
+                stack.append(clade)
+        return pairs
+
+    if tree.rooted:
+        G = networkx.DiGraph()
+    else:
+        G = networkx.Graph()
+    G.add_node(tree.root)
+    pairs = collect_edges(tree.root)
+    G.add_nodes_from(child for parent, child in pairs)
     # NB (1/2010): the networkx API stabilized at v.1.0
     # 1.0+: edges accept arbitrary data as kwargs, weights are floats
     # 0.99: edges accept weight as a string, nothing else
     # pre-0.99: edges accept no additional data
     # Ubuntu Lucid LTS uses v0.99, let's support everything
+    # NB: the generators are consumed in parent-before-child order, which
+    # the cascading color/width logic in edge_data relies on
     if networkx.__version__ >= "1.0":
-
-        def add_edge(graph, n1, n2):
-            graph.add_edge(n1, n2, weight=n2.branch_length or 1.0)
-            # Copy branch color value as hex, if available
-            if hasattr(n2, "color") and n2.color is not None:
-                graph[n1][n2]["color"] = n2.color.to_hex()
-            elif hasattr(n1, "color") and n1.color is not None:
-                # Cascading color attributes
-                graph[n1][n2]["color"] = n1.color.to_hex()
-                n2.color = n1.color
-            # Copy branch weight value (float) if available
-            if hasattr(n2, "width") and n2.width is not None:
-                graph[n1][n2]["width"] = n2.width
-            elif hasattr(n1, "width") and n1.width is not None:
-                # Cascading width attributes
-                graph[n1][n2]["width"] = n1.width
-                n2.width = n1.width
-
+        G.add_edges_from(
+            (parent, child, edge_data(parent, child)) for parent, child in pairs
+        )
     elif networkx.__version__ >= "0.99":
-
-        def add_edge(graph, n1, n2):
-            graph.add_edge(n1, n2, (n2.branch_length or 1.0))
-
-    else:
-
-        def add_edge(graph, n1, n2):
-            graph.add_edge(n1, n2)
-
-    def build_subgraph(graph, top):
-        """Walk down the Tree, building graphs, edges and nodes."""
-        for clade in top:
-            graph.add_node(clade.root)
-            add_edge(graph, top.root, clade.root)
-            build_subgraph(graph, clade)
-
-    if tree.rooted:
-        G = networkx.DiGraph()
+        G.add_edges_from(
+            (parent, child, child.branch_length or 1.0) for parent, child in pairs
+        )
     else:
-        G = networkx.Graph()
-    G.add_node(tree.root)
-    build_subgraph(G, tree.root)
+        G.add_edges_from(pairs)
     return G
 
 
@@ -117,15 +138,23 @@ def draw_ascii(tree, file=None, column_width=80):
 
     def get_col_positions(tree):
         """Create a mapping of each clade to its column position."""
-        depths = tree.depths()
-        # If there are no branch lengths, assume unit branch lengths
-        if max(depths.values()) == 0:
-            depths = tree.depths(unit_branch_lengths=True)
+        # If there are no branch lengths, assume unit branch lengths.
+        # A bare stack walk, stopping at the first branch length found,
+        # avoids both a second depths() call and the per-clade filtering
+        # overhead of find_clades()
+        has_branch_lengths = False
+        stack = [tree.root]
+        while stack:
+            clade = stack.pop()
+            if clade.branch_length:
+                has_branch_lengths = True
+                break
+            stack.extend(clade.clades)
+        depths = tree.depths(unit_branch_lengths=not has_branch_lengths)
+        max_depth = max(depths.values())
         # Potential drawing overflow due to rounding -- 1 char per tree layer
         fudge_margin = int(math.ceil(math.log(len(taxa), 2)))
-        cols_per_branch_unit = (drawing_width - fudge_margin) / float(
-            max(depths.values())
-        )
+        cols_per_branch_unit = (drawing_width - fudge_margin) / float(max_depth)
         return {
             clade: int(blen * cols_per_branch_unit + 1.0)
             for clade, blen in depths.items()
@@ -135,43 +164,79 @@ def draw_ascii(tree, file=None, column_width=80):
         positions = {taxon: 2 * idx for idx, taxon in enumerate(taxa)}
 
         def calc_row(clade):
-            for subclade in clade:
-                if subclade not in positions:
-                    calc_row(subclade)
-            positions[clade] = (
-                positions[clade.clades[0]] + positions[clade.clades[-1]]
-            ) // 2
+            # Iterative postorder traversal; recursion would overflow the
+            # stack on very deep trees
+            stack = [(clade, False)]
+            while stack:
+                node, children_done = stack.pop()
+                if children_done:
+                    positions[node] = (
+                        positions[node.clades[0]] + positions[node.clades[-1]]
+                    ) // 2
+                else:
+                    stack.append((node, True))
+                    for subclade in node:
+                        if subclade not in positions:
+                            stack.append((subclade, False))
 
         calc_row(tree.root)
         return positions
 
     col_positions = get_col_positions(tree)
     row_positions = get_row_positions(tree)
-    char_matrix = [[" " for x in range(drawing_width)] for y in range(drawing_height)]
-
-    def draw_clade(clade, startcol):
-        thiscol = col_positions[clade]
-        thisrow = row_positions[clade]
-        # Draw a horizontal line
-        for col in range(startcol, thiscol):
-            char_matrix[thisrow][col] = "_"
-        if clade.clades:
-            # Draw a vertical line
-            toprow = row_positions[clade.clades[0]]
-            botrow = row_positions[clade.clades[-1]]
-            for row in range(toprow + 1, botrow + 1):
-                char_matrix[row][thiscol] = "|"
-            # NB: Short terminal branches need something to stop rstrip()
-            if (col_positions[clade.clades[0]] - thiscol) < 2:
-                char_matrix[toprow][thiscol] = ","
-            # Draw descendents
-            for child in clade:
-                draw_clade(child, thiscol + 1)
-
-    draw_clade(tree.root, 0)
+    # The canvas is kept as a flat uint8 buffer with manual row striding,
+    # so each horizontal run below is one contiguous store
+    stride = drawing_width
+    char_buf = np.full(drawing_height * stride, ord(" "), dtype=np.uint8)
+
+    def collect_fills(clade, startcol):
+        """Walk the tree, recording the character runs for each branch.
+
+        Returns a list of (row_start, row_stop, col_start, col_stop, char)
+        fill operations -- pure integers, so rasterizing them afterwards
+        is a tight loop of contiguous NumPy stores.
+        """
+        fills = []
+        # Iterative preorder traversal; recursion would overflow the stack
+        # on very deep trees
+        stack = [(clade, startcol)]
+        while stack:
+            clade, startcol = stack.pop()
+            thiscol = col_positions[clade]
+            thisrow = row_positions[clade]
+            # Draw a horizontal line
+            fills.append((thisrow, thisrow + 1, startcol, thiscol, ord("_")))
+            if clade.clades:
+                # Draw a vertical line
+                toprow = row_positions[clade.clades[0]]
+                botrow = row_positions[clade.clades[-1]]
+                fills.append((toprow + 1, botrow + 1, thiscol, thiscol + 1, ord("|")))
+                # NB: Short terminal branches need something to stop rstrip()
+                if (col_positions[clade.clades[0]] - thiscol) < 2:
+                    fills.append((toprow, toprow + 1, thiscol, thiscol + 1, ord(",")))
+                # Draw descendents
+                for child in reversed(clade.clades):
+                    stack.append((child, thiscol + 1))
+        return fills
+
+    for row_start, row_stop, col_start, col_stop, char in collect_fills(tree.root, 0):
+        # Clamp to the row width: degenerate layouts (e.g. zero-length
+        # terminal branches) can push a column past the canvas, and with a
+        # flat buffer that would silently wrap into the next row
+        if col_start >= stride:
+            continue
+        col_stop = min(col_stop, stride)
+        if row_stop - row_start == 1:
+            # Horizontal run: a single contiguous store
+            base = row_start * stride
+            char_buf[base + col_start : base + col_stop] = char
+        else:
+            # Vertical run: a strided store down the column
+            char_buf[row_start * stride + col_start : row_stop * stride : stride] = char
     # Print the complete drawing
-    for idx, row in enumerate(char_matrix):
-        line = "".join(row).rstrip()
+    for idx in range(drawing_height):
+        row = char_buf[idx * stride : (idx + 1) * stride]
+        line = row.tobytes().decode("ascii").rstrip()
         # Add labels for terminal taxa in the right margin
         if idx % 2 == 0:
             line += " " + str(taxa[idx // 2])
@@ -257,11 +322,23 @@ def draw(
 
     import matplotlib.collections as mpcollections
 
-    # Arrays that store lines for the plot of clades
-    horizontal_linecollections = []
-    vertical_linecollections = []
+    # Arrays that store line segments (with colors and widths) for the plot
+    # of clades; each orientation becomes a single LineCollection below
+    horizontal_segments = []
+    horizontal_colors = []
+    horizontal_linewidths = []
+    vertical_segments = []
+    vertical_colors = []
+    vertical_linewidths = []
+    # Text annotations, collected during the tree walk and emitted in a
+    # tight loop afterwards, keeping matplotlib calls out of the traversal
+    label_items = []  # (x, y, text, color)
+    conf_items = []  # (x, y, text)
 
     # Options for displaying branch labels / confidence
+    # Memoized since many branches typically share the same (rounded)
+    # confidence value; the cache only lives for this draw call
+    @functools.lru_cache(maxsize=1024)
     def conf2str(conf):
         if int(conf) == conf:
             return str(int(conf))
@@ -271,12 +348,12 @@ def draw(
         if show_confidence:
 
             def format_branch_label(clade):
-                try:
-                    confidences = clade.confidences
+                # getattr with a default avoids paying for an
+                # AttributeError on every clade without confidences --
+                # the common case for Newick trees
+                confidences = getattr(clade, "confidences", None)
+                if confidences is not None:
                     # phyloXML supports multiple confidences
-                except AttributeError:
-                    pass
-                else:
                     return "/".join(conf2str(cnf.value) for cnf in confidences)
                 if clade.confidence is not None:
                     return conf2str(clade.confidence)
@@ -319,45 +396,65 @@ def draw(
 
     # Layout
 
-    def get_x_positions(tree):
-        """Create a mapping of each clade to its horizontal position.
+    def get_positions(tree):
+        """Create mappings of each clade to its horizontal and vertical position.
 
-        Dict of {clade: x-coord}
+        Returns a pair of dicts, {clade: x-coord} and {clade: y-coord}.
+        X coordinates are cumulative branch lengths from the root (or
+        level numbers if the tree has no branch lengths); y coordinates
+        are integers for tips, with internal nodes at the midpoint of
+        their first and last children. Everything is computed in one
+        iterative preorder walk plus linear passes over the visited list,
+        instead of separate depths/get_terminals/midpoint traversals.
         """
-        depths = tree.depths()
+        x_posns = {tree.root: tree.root.branch_length or 0}
+        y_posns = {}
+        has_branch_lengths = bool(tree.root.branch_length)
+        # Preorder walk: accumulate branch lengths for x, number the tips
+        # for y (row order equals traversal order), and remember the
+        # internal nodes in visiting order for the passes below
+        internals = []
+        ntips = 0
+        stack = [tree.root]
+        while stack:
+            clade = stack.pop()
+            if clade.clades:
+                internals.append(clade)
+                for child in reversed(clade.clades):
+                    if child.branch_length:
+                        has_branch_lengths = True
+                    x_posns[child] = x_posns[clade] + (child.branch_length or 0)
+                    stack.append(child)
+            else:
+                ntips += 1
+                y_posns[clade] = ntips
         # If there are no branch lengths, assume unit branch lengths
-        if not max(depths.values()):
-            depths = tree.depths(unit_branch_lengths=True)
-        return depths
-
-    def get_y_positions(tree):
-        """Create a mapping of each clade to its vertical position.
-
-        Dict of {clade: y-coord}.
-        Coordinates are negative, and integers for tips.
-        """
-        maxheight = tree.count_terminals()
-        # Rows are defined by the tips
-        heights = {
-            tip: maxheight - i for i, tip in enumerate(reversed(tree.get_terminals()))
-        }
-
-        # Internal nodes: place at midpoint of children
-        def calc_row(clade):
-            for subclade in clade:
-                if subclade not in heights:
-                    calc_row(subclade)
-            # Closure over heights
-            heights[clade] = (
-                heights[clade.clades[0]] + heights[clade.clades[-1]]
+        if not has_branch_lengths:
+            for clade in internals:
+                for child in clade.clades:
+                    x_posns[child] = x_posns[clade] + 1
+        # Internal nodes: place at midpoint of children. Reversed preorder
+        # guarantees children are placed before their parent.
+        for clade in reversed(internals):
+            y_posns[clade] = (
+                y_posns[clade.clades[0]] + y_posns[clade.clades[-1]]
             ) / 2.0
+        return x_posns, y_posns
 
-        if tree.root.clades:
-            calc_row(tree.root)
-        return heights
-
-    x_posns = get_x_positions(tree)
-    y_posns = get_y_positions(tree)
+    x_posns, y_posns = get_positions(tree)
+    # Single O(N) scans over the layout, shared by the drawing and the
+    # axis-limit code below
+    xmax = max(x_posns.values())
+    ymax = max(y_posns.values())
+    # Evaluate the label/color callbacks once per clade up front, so the
+    # drawing loop below only does dict lookups
+    labels = {clade: label_func(clade) for clade in x_posns}
+    conf_labels = {clade: format_branch_label(clade) for clade in x_posns}
+    text_colors = {
+        clade: get_label_color(label)
+        for clade, label in labels.items()
+        if label not in (None, clade.__class__.__name__)
+    }
     # The function draw_clade closes over the axes object
     if axes is None:
         fig = plt.figure()
@@ -365,104 +462,78 @@ def draw(
     elif not isinstance(axes, plt.matplotlib.axes.Axes):
         raise ValueError("Invalid argument for axes: %s" % axes)
 
-    def draw_clade_lines(
-        use_linecollection=False,
-        orientation="horizontal",
-        y_here=0,
-        x_start=0,
-        x_here=0,
-        y_bot=0,
-        y_top=0,
-        color="black",
-        lw=".1",
-    ):
-        """Create a line with or without a line collection object.
-
-        Graphical formatting of the lines representing clades in the plot can be
-        customized by altering this function.
-        """
-        if not use_linecollection and orientation == "horizontal":
-            axes.hlines(y_here, x_start, x_here, color=color, lw=lw)
-        elif use_linecollection and orientation == "horizontal":
-            horizontal_linecollections.append(
-                mpcollections.LineCollection(
-                    [[(x_start, y_here), (x_here, y_here)]], color=color, lw=lw
-                )
-            )
-        elif not use_linecollection and orientation == "vertical":
-            axes.vlines(x_here, y_bot, y_top, color=color)
-        elif use_linecollection and orientation == "vertical":
-            vertical_linecollections.append(
-                mpcollections.LineCollection(
-                    [[(x_here, y_bot), (x_here, y_top)]], color=color, lw=lw
-                )
-            )
+    # rcParams lookups go through validation logic; read the default line
+    # width once rather than per clade
+    base_lw = plt.rcParams["lines.linewidth"]
 
     def draw_clade(clade, x_start, color, lw):
-        """Recursively draw a tree, down from the given clade."""
-        x_here = x_posns[clade]
-        y_here = y_posns[clade]
-        # phyloXML-only graphics annotations
-        if hasattr(clade, "color") and clade.color is not None:
-            color = clade.color.to_hex()
-        if hasattr(clade, "width") and clade.width is not None:
-            lw = clade.width * plt.rcParams["lines.linewidth"]
-        # Draw a horizontal line from start to here
-        draw_clade_lines(
-            use_linecollection=True,
-            orientation="horizontal",
-            y_here=y_here,
-            x_start=x_start,
-            x_here=x_here,
-            color=color,
-            lw=lw,
-        )
-        # Add node/taxon labels
-        label = label_func(clade)
-        if label not in (None, clade.__class__.__name__):
-            axes.text(
-                x_here,
-                y_here,
-                " %s" % label,
-                verticalalignment="center",
-                color=get_label_color(label),
-            )
-        # Add label above the branch (optional)
-        conf_label = format_branch_label(clade)
-        if conf_label:
-            axes.text(
-                0.5 * (x_start + x_here),
-                y_here,
-                conf_label,
-                fontsize="small",
-                horizontalalignment="center",
+        """Draw a tree iteratively, down from the given clade.
+
+        Uses an explicit stack rather than recursion, so deep trees do not
+        hit Python's recursion limit.
+        """
+        stack = [(clade, x_start, color, lw)]
+        while stack:
+            clade, x_start, color, lw = stack.pop()
+            x_here = x_posns[clade]
+            y_here = y_posns[clade]
+            # phyloXML-only graphics annotations
+            clade_color = getattr(clade, "color", None)
+            if clade_color is not None:
+                color = clade_color.to_hex()
+            clade_width = getattr(clade, "width", None)
+            if clade_width is not None:
+                lw = clade_width * base_lw
+            # Draw a horizontal line from start to here
+            horizontal_segments.append([(x_start, y_here), (x_here, y_here)])
+            horizontal_colors.append(color)
+            horizontal_linewidths.append(lw)
+            # Add node/taxon labels
+            label = labels[clade]
+            if label not in (None, clade.__class__.__name__):
+                label_items.append((x_here, y_here, " %s" % label, text_colors[clade]))
+            # Add label above the branch (optional)
+            conf_label = conf_labels[clade]
+            if conf_label:
+                conf_items.append((0.5 * (x_start + x_here), y_here, conf_label))
+            if clade.clades:
+                # Draw a vertical line connecting all children
+                y_top = y_posns[clade.clades[0]]
+                y_bot = y_posns[clade.clades[-1]]
+                # Only apply widths to horizontal lines, like Archaeopteryx
+                vertical_segments.append([(x_here, y_bot), (x_here, y_top)])
+                vertical_colors.append(color)
+                vertical_linewidths.append(lw)
+                # Draw descendents
+                for child in reversed(clade.clades):
+                    stack.append((child, x_here, color, lw))
+
+    draw_clade(tree.root, 0, "k", base_lw)
+
+    # Emit the collected text annotations
+    for x, y, text, color in label_items:
+        axes.text(x, y, text, verticalalignment="center", color=color)
+    for x, y, text in conf_items:
+        axes.text(x, y, text, fontsize="small", horizontalalignment="center")
+
+    # If line collections were used to create clade lines, here they are
+    # bundled into one collection per orientation and added to the plot.
+    if horizontal_segments:
+        axes.add_collection(
+            mpcollections.LineCollection(
+                horizontal_segments,
+                colors=horizontal_colors,
+                linewidths=horizontal_linewidths,
             )
-        if clade.clades:
-            # Draw a vertical line connecting all children
-            y_top = y_posns[clade.clades[0]]
-            y_bot = y_posns[clade.clades[-1]]
-            # Only apply widths to horizontal lines, like Archaeopteryx
-            draw_clade_lines(
-                use_linecollection=True,
-                orientation="vertical",
-                x_here=x_here,
-                y_bot=y_bot,
-                y_top=y_top,
-                color=color,
-                lw=lw,
+        )
+    if vertical_segments:
+        axes.add_collection(
+            mpcollections.LineCollection(
+                vertical_segments,
+                colors=vertical_colors,
+                linewidths=vertical_linewidths,
             )
-            # Draw descendents
-            for child in clade:
-                draw_clade(child, x_here, color, lw)
-
-    draw_clade(tree.root, 0, "k", plt.rcParams["lines.linewidth"])
-
-    # If line collections were used to create clade lines, here they are added
-    # to the pyplot plot.
-    for i in horizontal_linecollections:
-        axes.add_collection(i)
-    for i in vertical_linecollections:
-        axes.add_collection(i)
+        )
 
     # Aesthetics
 
@@ -476,11 +547,10 @@ def draw(
     axes.set_xlabel("branch length")
     axes.set_ylabel("taxa")
     # Add margins around the tree to prevent overlapping the axes
-    xmax = max(x_posns.values())
     axes.set_xlim(-0.05 * xmax, 1.25 * xmax)
     # Also invert the y-axis (origin at the top)
     # Add a small vertical margin, but avoid including 0 and N+1 on the y axis
-    axes.set_ylim(max(y_posns.values()) + 0.8, 0.2)
+    axes.set_ylim(ymax + 0.8, 0.2)
 
     # Parse and process key word arguments as pyplot options
     for key, value in kwargs.items():
@@ -91,6 +91,18 @@ class UtilTests(unittest.TestCase):
         Phylo.draw(dollo, label_colors=label_colors_dollo, do_show=False)
         Phylo.draw(apaf, label_colors=label_colors_apaf, do_show=False)
 
+    def test_draw_deep_tree(self):
+        """Lay out a tree deeper than Python's recursion limit.
+
+        The drawing code walks the tree with explicit stacks, so this
+        must not raise RecursionError. Don't display the tree.
+        """
+        pyplot.ioff()  # Turn off interactive display
+        depth = 4000
+        treedata = "(" * depth + "A" + ",B)" * depth + ";"
+        tree = Phylo.read(StringIO(treedata), "newick")
+        Phylo.draw(tree, do_show=False)
+
     def test_draw_ascii(self):
         """Tree to Graph conversion."""
         handle = StringIO()
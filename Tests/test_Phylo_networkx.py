@@ -35,6 +35,18 @@ class UtilTests(unittest.TestCase):
         G = Phylo.to_networkx(tree)
         self.assertEqual(len(G.nodes()), 659)
 
+    def test_to_networkx_deep_tree(self):
+        """Convert a tree deeper than Python's recursion limit.
+
+        The conversion walks the tree iteratively, so this must not
+        raise RecursionError.
+        """
+        depth = 4000
+        treedata = "(" * depth + "A" + ",B)" * depth + ";"
+        tree = Phylo.read(StringIO(treedata), "newick")
+        G = Phylo.to_networkx(tree)
+        self.assertEqual(len(G.nodes()), 2 * depth + 1)
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)